@@ -1,6 +1,120 @@
+import ahocorasick
+import hashlib
+import inspect
 import pandas as pd
 import re
 
+# Prefer the Rust-backed calamine reader (pandas >= 2.2) when it is installed
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = "openpyxl"
+
+# Source column names and their internal names; other columns are not read
+COLUMN_MAP = {
+    'Name': 'name',
+    'Professional Title/Employment & Career': 'employment',
+    'Board Service': 'board_service'
+}
+
+# Common placeholder / missing info strings
+IGNORE_STRINGS = [
+    "no board service info",
+    "no employment information provided",
+    "no info available",
+    "no employment/military info in database",
+    "retired",
+    "(retired)",
+    "no employment info",
+    "no board service information provided",
+    "no known board roles",
+    "no publicly known board positions",
+    "no board affiliations found.",
+    "no board service identified",
+    "no formal board service identified",
+    "no professional information",
+    "no board roles identified",
+    "no explicit board memberships found",
+    "no information found",
+    "no information found - refers to facilities not a person",
+    "nonprofit: none"
+]
+
+# Common org suffixes
+ORG_SUFFIXES = [
+    "inc", "corp", "corporation", "ltd", "llc", "co", "company", "foundation", "institute",
+    "university", "college", "academy", "association", "group", "holdings"
+]
+
+# Generic titles / board roles
+TITLES = [
+    "ceo", "cfo", "coo", "president", "chair", "director", "member", "trustee", "secretary",
+    "treasurer", "advisor", "officer", "researcher", "managing director"
+]
+
+STOPWORDS = ["the", "of", "and", "a", "an", "for", "in", "on", "at", "by", "with"]
+
+
+def _trie_pattern(words) -> str:
+    """
+    Build an alternation matching exactly the given words, nested by shared
+    prefix so the regex engine branches once per character instead of
+    retrying every word at every position.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = None
+
+    def build(node):
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        if len(alts) == 1 and "" not in node:
+            return alts[0]
+        group = "(?:" + "|".join(alts) + ")"
+        return group + "?" if "" in node else group
+
+    return build(trie)
+
+
+# Placeholders are plain literals, so they are matched with a single Aho-Corasick
+# scan instead of a regex. Patterns below are compiled once at import time.
+_PLACEHOLDERS = ahocorasick.Automaton()
+for _s in IGNORE_STRINGS:
+    _PLACEHOLDERS.add_word(_s, len(_s))
+_PLACEHOLDERS.make_automaton()
+
+_BR_RE = re.compile(r"<br\s*/?>")
+_FUSED_RE = re.compile(r"\b(?:" + _trie_pattern(ORG_SUFFIXES + TITLES + STOPWORDS) + r")\b")
+_YEAR_RE = re.compile(r"\d{4}\s*-\s*(\d{4}|present)")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
+def _strip_placeholders(text: str) -> str:
+    """
+    Replace the leftmost-longest, non-overlapping placeholder matches in text
+    with a space, so text on either side never fuses into one token.
+    """
+    parts = []
+    start = 0
+    for end, length in _PLACEHOLDERS.iter_long(text):
+        parts.append(text[start:end - length + 1])
+        start = end + 1
+    if not parts:
+        return text
+    parts.append(text[start:])
+    return " ".join(parts)
+
+
+def _collapse_whitespace(text: str) -> str:
+    """Collapse runs of whitespace to single spaces and trim the ends."""
+    return " ".join(text.split())
+
+
 class DataParser:
     def __init__(self):
         self.df = None
@@ -11,77 +125,91 @@ class DataParser:
 
         text = text.lower()
 
-        # Remove common placeholder / missing info strings
-        ignore_strings = [
-            "no board service info",
-            "no employment information provided",
-            "no info available",
-            "no employment/military info in database",
-            "retired",
-            "(retired)",
-            "no employment info",
-            "no board service information provided",
-            "no known board roles",
-            "no publicly known board positions",
-            "no board affiliations found.",
-            "no board service identified",
-            "no formal board service identified",
-            "no professional information",
-            "no board roles identified",
-            "no explicit board memberships found",
-            "no information found",
-            "no information found - refers to facilities not a person",
-            "nonprofit: none"
-        ]
-
-        # Replace any placeholder string with empty string
-        for s in ignore_strings:
-            text = text.replace(s, "")
+        # Remove placeholder strings
+        text = _strip_placeholders(text)
 
         # Remove HTML line breaks
-        text = re.sub(r"<br\s*/?>", " ", text)
-
-        # Remove common org suffixes
-        text = re.sub(r"\b(inc|corp|corporation|ltd|llc|co|company|foundation|institute|university|college|academy|association|group|holdings)\b", " ", text)
-
-        # Remove generic titles / board roles
-        text = re.sub(r"\b(ceo|cfo|coo|president|chair|director|member|trustee|secretary|treasurer|advisor|officer|researcher|managing director)\b", " ", text)
+        text = _BR_RE.sub(" ", text)
 
-        # Remove stopwords
-        text = re.sub(r"\b(the|of|and|a|an|for|in|on|at|by|with)\b", " ", text)
+        # Remove org suffixes, generic titles / board roles and stopwords in one pass
+        text = _FUSED_RE.sub(" ", text)
 
         # Remove years
-        text = re.sub(r"\d{4}\s*-\s*(\d{4}|present)", " ", text)
+        text = _YEAR_RE.sub(" ", text)
 
         # Remove other punctuation
-        text = re.sub(r"[^\w\s]", " ", text)
+        text = _PUNCT_RE.sub(" ", text)
 
         # Collapse multiple spaces
-        text = re.sub(r"\s+", " ", text).strip()
+        text = _collapse_whitespace(text)
 
         return text
 
+    def _normalize_series(self, s: pd.Series) -> pd.Series:
+        """Vectorized equivalent of normalize_text for a whole column."""
+        # Python's str.lower, not Arrow's utf8_lower: they disagree on
+        # characters such as 'İ', and queries go through normalize_text
+        s = s.map(lambda text: _strip_placeholders(text.lower()))
+        s = s.str.replace(_BR_RE, " ", regex=True)
+        s = s.str.replace(_FUSED_RE, " ", regex=True)
+        s = s.str.replace(_YEAR_RE, " ", regex=True)
+        s = s.str.replace(_PUNCT_RE, " ", regex=True)
+        return s.map(_collapse_whitespace)
+
+    def _read_excel(self, source):
+        """Read only the mapped columns, as strings, skipping type inference."""
+        return pd.read_excel(
+            source,
+            engine=EXCEL_ENGINE,
+            dtype=str,
+            usecols=lambda col: col in COLUMN_MAP
+        )
+
     def parse_excel(self, file_path: str):
         """Parse Excel file from disk."""
-        self.df = pd.read_excel(file_path)
+        self.df = self._read_excel(file_path)
         return self._process_dataframe()
 
     def parse_excel_bytes(self, file_bytes):
-        """Parse Excel file from uploaded bytes."""
-        self.df = pd.read_excel(file_bytes)
+        """Parse Excel file from an uploaded bytes buffer or file object."""
+        self.df = self._read_excel(file_bytes)
         return self._process_dataframe()
 
     def _process_dataframe(self):
         """Internal method to process the dataframe after loading."""
-        self.df = self.df.rename(columns={
-            'Name': 'name',
-            'Professional Title/Employment & Career': 'employment',
-            'Board Service': 'board_service'
-        })
+        self.df = self.df.rename(columns=COLUMN_MAP)
 
         self.df = self.df.fillna('')
 
-        self.df['employment_norm'] = self.df['employment'].apply(self.normalize_text)
-        self.df['board_service_norm'] = self.df['board_service'].apply(self.normalize_text)
-
-        return self.df
\ No newline at end of file
+        # Arrow-backed strings: contiguous buffers and C++ string kernels.
+        # On pandas >= 3 the default str dtype is already Arrow-backed.
+        for col in COLUMN_MAP.values():
+            if col in self.df.columns:
+                self.df[col] = self.df[col].astype('string[pyarrow]')
+
+        # Missing columns are left out so callers can report them
+        for col in ['employment', 'board_service']:
+            if col in self.df.columns:
+                self.df[f'{col}_norm'] = self._normalize_series(self.df[col])
+
+        return self.df
+
+
+def _normalization_fingerprint() -> str:
+    """
+    Hash of everything that determines normalized output: the word and
+    placeholder lists, the compiled patterns and the normalization code.
+    Saved indexes record it, so any change to normalization invalidates them.
+    """
+    parts = [
+        IGNORE_STRINGS, ORG_SUFFIXES, TITLES, STOPWORDS,
+        [p.pattern for p in (_BR_RE, _FUSED_RE, _YEAR_RE, _PUNCT_RE)],
+        [inspect.getsource(f) for f in (
+            _strip_placeholders, _collapse_whitespace,
+            DataParser.normalize_text, DataParser._normalize_series, DataParser._process_dataframe
+        )]
+    ]
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+
+
+NORMALIZATION_VERSION = _normalization_fingerprint()
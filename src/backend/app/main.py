@@ -2,22 +2,35 @@ from fastapi import FastAPI, HTTPException, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from contextlib import asynccontextmanager
+import asyncio
+import glob
+import hashlib
 import io
-import pandas as pd
+import logging
 import re
 import os
+import xlsxwriter
 
 from .models import MatchRequest, MatchResponse, MatchResult, UploadResponse, HealthResponse, ExportRequest
 from .tfidf_model import TFIDFModel
 from .data_parser import DataParser
 
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
+
 # Security constants
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
 ALLOWED_MIME_TYPES = [
     'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',  # .xlsx
     'application/vnd.ms-excel',  # .xls
 ]
 
+# Fitted models are persisted here, keyed by a hash of the uploaded file
+MODEL_DIR = os.getenv("MODEL_DIR", "saved_models")
+MAX_SAVED_MODELS = 5
+MODEL_PARAMS = {'max_features': 10000, 'ngram_range': (1, 2)}
+
 # Global variables
 search_model = None
 dataset = None
@@ -39,17 +52,83 @@ def sanitize_excel_value(value):
     
     return value
 
+def build_matches_xlsx(matches):
+    """
+    Write match results to an in-memory Excel file.
+    Rows are streamed in constant-memory mode and values are sanitized.
+    """
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('Matches')
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center'})
+    
+    worksheet.write_row(0, 0, ['Name', 'Employment', 'Board Service', 'Match Score', 'Rank'], header_format)
+    for row, match in enumerate(matches, start=1):
+        # Write text explicitly as strings so nothing is interpreted as a formula
+        worksheet.write_string(row, 0, sanitize_excel_value(match.name))
+        worksheet.write_string(row, 1, sanitize_excel_value(match.employment))
+        worksheet.write_string(row, 2, sanitize_excel_value(match.board_service))
+        worksheet.write_number(row, 3, match.score)
+        worksheet.write_number(row, 4, match.rank)
+    
+    workbook.close()
+    return output
+
+def saved_model_path(key):
+    return os.path.join(MODEL_DIR, f"{key}.joblib")
+
+def saved_model_paths():
+    """Saved model files, most recently used first."""
+    paths = glob.glob(os.path.join(MODEL_DIR, "*.joblib"))
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+def save_model(model, key):
+    """Persist a fitted model and prune all but the most recent ones."""
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    model.save(saved_model_path(key))
+    for path in saved_model_paths()[MAX_SAVED_MODELS:]:
+        os.remove(path)
+
+def load_saved_model(path):
+    """
+    Load a saved model and mark it as the most recently used.
+    Returns None and deletes the file if it can't be loaded (truncated,
+    or written by an incompatible version), so callers can refit instead.
+    """
+    try:
+        model = TFIDFModel.load(path, **MODEL_PARAMS)
+    except Exception as e:
+        logger.warning("Discarding unusable saved model %s: %s", path, e)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    os.utime(path)
+    return model
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    global search_model
-    print("API starting up...")
-    print("Waiting for dataset upload...")
+    global dataset, search_model
+    logger.info("API starting up...")
+    
+    # Restore the most recently used loadable model so a restart doesn't need a re-upload
+    for path in saved_model_paths():
+        model = await asyncio.to_thread(load_saved_model, path)
+        if model is not None:
+            search_model = model
+            dataset = search_model.df
+            logger.info("Restored dataset from %s (%d rows)", path, len(dataset))
+            break
+    
+    if search_model is None:
+        logger.info("Waiting for dataset upload...")
     
     yield
     
     # Shutdown
-    print("Shutting down...")
+    logger.info("Shutting down...")
 
 app = FastAPI(
     title="TF-IDF Connection Matcher API",
@@ -118,25 +197,51 @@ async def upload_dataset(file: UploadFile = File(...)):
         )
     
     try:
-        # Read file contents with size limit
-        contents = await file.read(MAX_FILE_SIZE + 1)
-        
-        # Check file size
-        if len(contents) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
-            )
+        # Starlette already spools the upload to a temporary file, so read it
+        # in chunks to enforce the size limit and hash it without buffering
+        # the whole file in memory
+        hasher = hashlib.blake2b(digest_size=16)
+        size = 0
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            
+            # Check file size
+            if size > MAX_FILE_SIZE:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
+                )
+            
+            hasher.update(chunk)
         
-        if len(contents) == 0:
+        if size == 0:
             raise HTTPException(
                 status_code=400,
                 detail="Empty file uploaded"
             )
         
+        # Reuse the saved model if this exact file was indexed before
+        key = hasher.hexdigest()
+        model = None
+        if os.path.exists(saved_model_path(key)):
+            model = await asyncio.to_thread(load_saved_model, saved_model_path(key))
+        if model is not None:
+            dataset = model.df
+            search_model = model
+            logger.info("Loaded saved model for upload %s", key)
+            
+            return UploadResponse(
+                status="success",
+                message="Dataset uploaded and indexed successfully",
+                rows_loaded=len(dataset),
+                columns=model.source_columns
+            )
+        
         # Parse the dataset
+        # Parsing and fitting are CPU-bound, so run them off the event loop
+        await file.seek(0)
         parser = DataParser()
-        df = parser.parse_excel_bytes(io.BytesIO(contents))
+        df = await asyncio.to_thread(parser.parse_excel_bytes, file.file)
         
         # Validate dataset isn't empty
         if df.empty:
@@ -154,25 +259,35 @@ async def upload_dataset(file: UploadFile = File(...)):
                 detail=f"Dataset missing required columns: {', '.join(missing)}"
             )
         
-        # Store the dataset globally
-        dataset = df
-        
         # Initialize and fit the TF-IDF model
-        search_model = TFIDFModel(max_features=10000, ngram_range=(1, 2))
-        search_model.fit_corpus(df, ['employment_norm', 'board_service_norm'])
+        model = TFIDFModel(**MODEL_PARAMS)
+        await asyncio.to_thread(model.fit_corpus, df, ['employment_norm', 'board_service_norm'])
+        
+        # Swap in the dataset and model together once fitting is done,
+        # so concurrent /match requests never see a half-built model.
+        # The dataset is the model's result rows on both the fresh and the
+        # saved-model path, so it has the same shape either way
+        dataset = model.df
+        search_model = model
+        
+        # Persist the fitted model; failing to save shouldn't fail the upload
+        try:
+            await asyncio.to_thread(save_model, model, key)
+        except Exception as e:
+            logger.warning("Failed to save model: %s", e)
         
         return UploadResponse(
             status="success",
             message="Dataset uploaded and indexed successfully",
-            rows_loaded=len(df),
-            columns=df.columns.tolist()
+            rows_loaded=len(dataset),
+            columns=model.source_columns
         )
         
     except HTTPException:
         raise
     except Exception as e:
         # Log the actual error server-side but return generic message to client
-        print(f"Upload error: {str(e)}")
+        logger.error("Upload error: %s", e)
         raise HTTPException(
             status_code=500, 
             detail="Failed to process uploaded file. Please ensure it's a valid Excel file."
@@ -196,13 +311,13 @@ async def match_connections(request: MatchRequest):
     if not request.query.strip():
         raise HTTPException(status_code=400, detail="Query cannot be empty")
     
-    print(f"Received match request: query='{request.query[:50]}...', top_k={request.top_k}, min_score={request.min_score}")
+    logger.debug("Received match request: query='%s...', top_k=%d, min_score=%s", request.query[:50], request.top_k, request.min_score)
     
     # Perform TF-IDF search with normalized scores and filtering
-    results_df = search_model.rank(request.query, top_k=request.top_k, min_score=request.min_score)
+    results = search_model.rank(request.query, top_k=request.top_k, min_score=request.min_score)
     
     # Handle case where no results meet threshold
-    if results_df.empty:
+    if len(results['score']) == 0:
         return MatchResponse(
             query=request.query,
             total_matches=0,
@@ -210,15 +325,16 @@ async def match_connections(request: MatchRequest):
         )
     
     # Convert to response format
-    matches = []
-    for idx, row in results_df.iterrows():
-        matches.append(MatchResult(
-            name=row['name'],
-            employment=row['employment'],
-            board_service=row['board_service'],
-            score=float(row['tfidf_score']),
-            rank=idx + 1
-        ))
+    rows = zip(
+        results['name'],
+        results['employment'],
+        results['board_service'],
+        results['score'].tolist()
+    )
+    matches = [
+        MatchResult(name=name, employment=employment, board_service=board_service, score=score, rank=i + 1)
+        for i, (name, employment, board_service, score) in enumerate(rows)
+    ]
     
     return MatchResponse(
         query=request.query,
@@ -243,24 +359,8 @@ async def export_matches(request: ExportRequest):
         )
     
     try:
-        # Convert matches to DataFrame with sanitization
-        data = []
-        for match in request.matches:
-            data.append({
-                'Name': sanitize_excel_value(match.name),
-                'Employment': sanitize_excel_value(match.employment),
-                'Board Service': sanitize_excel_value(match.board_service),
-                'Match Score': match.score,
-                'Rank': match.rank
-            })
-        
-        df = pd.DataFrame(data)
-        
         # Create Excel file in memory
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Matches')
-        
+        output = await asyncio.to_thread(build_matches_xlsx, request.matches)
         output.seek(0)
         
         # Return as downloadable file
@@ -274,7 +374,7 @@ async def export_matches(request: ExportRequest):
         raise
     except Exception as e:
         # Log actual error but return generic message
-        print(f"Export error: {str(e)}")
+        logger.error("Export error: %s", e)
         raise HTTPException(
             status_code=500, 
             detail="Failed to export results. Please try again."
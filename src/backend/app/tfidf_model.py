@@ -1,82 +1,267 @@
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import pandas as pd
+from collections import OrderedDict
+import joblib
+import logging
+import os
+import re
 import numpy as np
+import pandas as pd
+import sklearn
+
+from .data_parser import NORMALIZATION_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the saved state layout changes. Normalization changes are
+# picked up automatically through NORMALIZATION_VERSION
+INDEX_FORMAT_VERSION = 2
 
 class TFIDFModel:
+    result_columns = ['name', 'employment', 'board_service']
+    cache_size = 512
+    # Well above float32 rounding error on the normalized [0, 1] scale
+    threshold_slack = 1e-5
+
     def __init__(self, max_features=None, ngram_range=(1, 2)):
         self.vectorizer = TfidfVectorizer(
             lowercase=True, 
             max_features=max_features, 
-            ngram_range=ngram_range
+            ngram_range=ngram_range,
+            norm='l2',
+            dtype=np.float32
         )
-        self.corpus_tfidf = None
-        self.corpus_texts = None
+        self.corpus_csc = None
         self.df = None
+        self.source_columns = None
+        # Vocabulary lookups used to vectorize queries without sklearn
+        self._vocab = None
+        self._idf = None
+        self._token_re = None
+        self._fast_query = False
+        # LRU caches for ranked results and query vectors
+        self._rank_cache = OrderedDict()
+        self._query_cache = OrderedDict()
+
+    def _cache_get(self, cache, key):
+        if key not in cache:
+            return None
+        cache.move_to_end(key)
+        return cache[key]
+
+    def _cache_put(self, cache, key, value):
+        cache[key] = value
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
 
     def fit_corpus(self, df, text_columns):
         """
         df: pandas DataFrame
         text_columns: list of columns to combine
         """
-        self.df = df.copy()
+        # Only keep the columns needed to format results, but remember the
+        # full column list so a restored model describes the same dataset
+        self.df = df[self.result_columns].copy()
+        self.source_columns = df.columns.tolist()
         # Combine text columns per row
-        self.corpus_texts = (
-            self.df[text_columns]
-            .fillna("")
-            .agg(" ".join, axis=1)
-            .tolist()
+        cols = [df[c].fillna("") for c in text_columns]
+        combined = cols[0]
+        for c in cols[1:]:
+            combined = combined + " " + c
+        # Fit TF-IDF and transform corpus. Only the column-major form is kept,
+        # so queries only touch the columns of their terms
+        self.corpus_csc = self.vectorizer.fit_transform(combined.tolist()).tocsc()
+        logger.info("TF-IDF corpus shape: %s", self.corpus_csc.shape)
+        self._build_query_index()
+        # Cached results refer to the previous corpus
+        self._rank_cache.clear()
+        self._query_cache.clear()
+
+    def _metadata(self):
+        """Everything a saved index depends on besides the uploaded file."""
+        params = self.vectorizer.get_params()
+        return {
+            'format_version': INDEX_FORMAT_VERSION,
+            'normalization_version': NORMALIZATION_VERSION,
+            'max_features': params['max_features'],
+            'ngram_range': tuple(params['ngram_range']),
+            'sklearn_version': sklearn.__version__,
+            'pandas_version': pd.__version__
+        }
+
+    def save(self, path):
+        """Persist the fitted vectorizer, corpus matrix and result rows."""
+        state = {
+            'metadata': self._metadata(),
+            'vectorizer': self.vectorizer,
+            'corpus_csc': self.corpus_csc,
+            'df': self.df,
+            'source_columns': self.source_columns
+        }
+        # Write uncompressed so the arrays can be memory-mapped on load, and
+        # replace atomically so a crash never leaves a truncated file behind
+        tmp_path = f"{path}.tmp"
+        joblib.dump(state, tmp_path, compress=0)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, **params):
+        """
+        Load a model written by save, given the constructor params it is
+        expected to have been fitted with.
+        Matrix arrays are memory-mapped and paged in from disk on demand.
+        Raises ValueError if the file was written with a different model
+        config, index format or library versions.
+        """
+        model = cls(**params)
+        state = joblib.load(path, mmap_mode='r')
+        if state.get('metadata') != model._metadata():
+            raise ValueError(f"Saved model metadata {state.get('metadata')} doesn't match {model._metadata()}")
+        model.vectorizer = state['vectorizer']
+        model.corpus_csc = state['corpus_csc']
+        model.df = state['df']
+        model.source_columns = state['source_columns']
+        model._build_query_index()
+        return model
+
+    def _build_query_index(self):
+        """Cache the fitted vocabulary, IDF weights and token regex for queries."""
+        params = self.vectorizer.get_params()
+        # vectorize_query only mirrors lowercased word n-grams from
+        # token_pattern with raw counts, IDF weights and L2 norm; any other
+        # config goes through vectorizer.transform
+        self._fast_query = (
+            params['analyzer'] == 'word'
+            and params['lowercase']
+            and params['preprocessor'] is None
+            and params['tokenizer'] is None
+            and params['token_pattern'] is not None
+            and params['stop_words'] is None
+            and params['strip_accents'] is None
+            and not params['binary']
+            and not params['sublinear_tf']
+            and params['use_idf']
+            and params['norm'] == 'l2'
         )
-        # Fit TF-IDF and transform corpus
-        self.corpus_tfidf = self.vectorizer.fit_transform(self.corpus_texts)
-        print(f"TF-IDF corpus shape: {self.corpus_tfidf.shape}")
+        if not self._fast_query:
+            return
+        self._vocab = self.vectorizer.vocabulary_
+        self._idf = self.vectorizer.idf_.astype(np.float32)
+        self._token_re = re.compile(self.vectorizer.token_pattern)
+
+    def vectorize_query(self, query):
+        """
+        Returns (term indices, weights) of the L2-normalized TF-IDF query vector.
+        Mirrors vectorizer.transform for a single string, without its per-call
+        overhead.
+        """
+        if not self._fast_query:
+            query_vec = self.vectorizer.transform([query])
+            query_vec.sort_indices()
+            return query_vec.indices.astype(np.int64), query_vec.data
+        
+        tokens = self._token_re.findall(query.lower())
+        min_n, max_n = self.vectorizer.ngram_range
+        counts = {}
+        for n in range(min_n, max_n + 1):
+            for i in range(len(tokens) - n + 1):
+                term_id = self._vocab.get(" ".join(tokens[i:i + n]))
+                if term_id is not None:
+                    counts[term_id] = counts.get(term_id, 0) + 1
+        
+        indices = np.fromiter(sorted(counts), dtype=np.int64, count=len(counts))
+        weights = np.array([counts[i] for i in indices], dtype=np.float32) * self._idf[indices]
+        norm = np.linalg.norm(weights)
+        if norm > 0:
+            weights /= norm
+        return indices, weights
 
     def compute_similarity(self, query):
-        """Returns cosine similarity scores for query against corpus."""
-        query_vec = self.vectorizer.transform([query])
-        scores = cosine_similarity(query_vec, self.corpus_tfidf).flatten()
+        """
+        Returns cosine similarity scores for query against corpus.
+        Rows are already L2-normalized by the vectorizer, so cosine
+        similarity is a plain sparse dot product over the query's terms.
+        """
+        query_vec = self._cache_get(self._query_cache, query)
+        if query_vec is None:
+            query_vec = self.vectorize_query(query)
+            self._cache_put(self._query_cache, query, query_vec)
+        indices, weights = query_vec
+        # Only the posting lists (CSC columns) of the query's terms are read;
+        # a query with no known terms matches nothing
+        if len(indices) == 0:
+            return np.zeros(self.corpus_csc.shape[0], dtype=self.corpus_csc.dtype)
+        scores = self.corpus_csc[:, indices] @ weights
         return scores
 
-    def normalize_scores(self, scores):
-        """Min-max normalize scores to [0, 1] range."""
-        if len(scores) == 0:
-            return scores
-        min_val, max_val = np.min(scores), np.max(scores)
+    def normalize_scores(self, scores, min_val, max_val):
+        """Min-max normalize scores to [0, 1] given the full corpus score range."""
         if max_val == min_val:
             return np.ones_like(scores) if max_val > 0 else np.zeros_like(scores)
         return (scores - min_val) / (max_val - min_val)
 
+    def raw_threshold(self, min_score, min_val, max_val):
+        """
+        Map a normalized score threshold back onto the raw score scale.
+        Computed in float64 and loosened by a small slack so it never excludes
+        a row that normalize_scores would keep; callers re-check candidates.
+        """
+        if max_val == min_val:
+            normalized = 1.0 if max_val > 0 else 0.0
+            return min_val if normalized >= min_score else np.inf
+        min_val, max_val = float(min_val), float(max_val)
+        span = max_val - min_val
+        return (min_score - self.threshold_slack) * span + min_val
+
     def rank(self, query, top_k=10, min_score=0.0):
         """
-        Returns top_k rows sorted by TF-IDF similarity.
-        Scores are normalized to [0, 1] range.
+        Returns the top_k rows sorted by TF-IDF similarity, as a dict of
+        result column arrays plus a 'score' array normalized to [0, 1].
         
         Args:
             query: Search query string
             top_k: Maximum number of results to return
             min_score: Minimum normalized score threshold (0-1)
         """
+        # The vectorizer ignores surrounding whitespace (and case, when it
+        # lowercases), so queries differing only in those share a cache entry
+        query = query.strip()
+        if self.vectorizer.lowercase:
+            query = query.lower()
+        key = (query, top_k, min_score)
+        results = self._cache_get(self._rank_cache, key)
+        if results is None:
+            results = self._rank(query, top_k, min_score)
+            self._cache_put(self._rank_cache, key, results)
+        return results
+
+    def _rank(self, query, top_k, min_score):
         scores = self.compute_similarity(query)
-        normalized_scores = self.normalize_scores(scores)
-        
-        print(f"Score range: min={normalized_scores.min():.4f}, max={normalized_scores.max():.4f}")
-        print(f"Filtering for scores >= {min_score}")
+        min_val, max_val = scores.min(), scores.max()
         
-        # Filter by minimum score
-        valid_idx = np.where(normalized_scores >= min_score)[0]
+        logger.debug("Score range: min=%.4f, max=%.4f", min_val, max_val)
+        logger.debug("Filtering for scores >= %s", min_score)
         
-        print(f"Found {len(valid_idx)} results above threshold")
+        # Normalization is monotonic, so filter on raw scores first, then
+        # re-check only those candidates on the normalized scale
+        candidates = np.where(scores >= self.raw_threshold(min_score, min_val, max_val))[0]
+        normalized = self.normalize_scores(scores[candidates], min_val, max_val)
+        valid_idx = candidates[normalized >= min_score]
         
-        if len(valid_idx) == 0:
-            return pd.DataFrame()
+        logger.debug("Found %d results above threshold", len(valid_idx))
         
-        # Sort by score and take top_k
-        sorted_idx = valid_idx[np.argsort(-normalized_scores[valid_idx])][:top_k]
+        # Select top_k in linear time, then sort only that slice
+        valid_scores = scores[valid_idx]
+        k = min(top_k, len(valid_scores))
+        sorted_idx = valid_idx[:0]
+        if k > 0:
+            part = np.argpartition(-valid_scores, k - 1)[:k]
+            sorted_idx = valid_idx[part[np.argsort(-valid_scores[part])]]
         
-        top_rows = self.df.iloc[sorted_idx].copy()
-        top_rows['tfidf_score'] = normalized_scores[sorted_idx]
+        # Slice only the returned rows out of each column, without building a DataFrame
+        results = {col: self.df[col].array[sorted_idx] for col in self.result_columns}
+        results['score'] = self.normalize_scores(scores[sorted_idx], min_val, max_val)
         
-        print(f"Returning {len(top_rows)} results")
-        print(f"Top scores: {normalized_scores[sorted_idx[:5]]}")
+        logger.debug("Returning %d results", len(sorted_idx))
+        logger.debug("Top scores: %s", results['score'][:5])
         
-        return top_rows.reset_index(drop=True)
\ No newline at end of file
+        return results
\ No newline at end of file
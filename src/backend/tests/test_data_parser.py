@@ -0,0 +1,43 @@
+import io
+import pandas as pd
+import pytest
+
+from app.data_parser import DataParser
+
+# Outputs of the original sequential re.sub / str.replace implementation
+BASELINE = [
+    ('Boston Red Sox Foundation, Inc.', 'boston red sox'),
+    ('CEO<br/>Acme Corp 2001 - present', 'acme'),
+    ('No board service info', ''),
+    ('Managing Director, Goldman Sachs & Co.', 'goldman sachs'),
+    ('Officer (Retired) Researcher', ''),
+    ('officer(retired)researcher', ''),
+    ('Trustee(Retired)Harvard', 'harvard'),
+    ('nonprofit: nonecharity retiredx', 'charity x'),
+    ('Café “Zürich” — co-director (1999-2005)!', 'café zürich'),
+    ('', ''),
+]
+
+
+@pytest.mark.parametrize('text, expected', BASELINE)
+def test_normalize_text_matches_baseline(text, expected):
+    assert DataParser().normalize_text(text) == expected
+
+
+@pytest.mark.parametrize('dtype', [object, 'string[pyarrow]'])
+def test_normalize_series_matches_normalize_text(dtype):
+    parser = DataParser()
+    # Arrow's utf8_lower disagrees with str.lower on characters like 'İ'
+    texts = [text for text, _ in BASELINE] + ['İceo', 'Director, İstanbul Holding', 'ΣΊΣΥΦΟΣ Corp']
+    result = parser._normalize_series(pd.Series(texts, dtype=dtype))
+    assert result.tolist() == [parser.normalize_text(text) for text in texts]
+
+
+def test_parse_excel_bytes_skips_missing_columns():
+    buffer = io.BytesIO()
+    pd.DataFrame({'Name': ['Ann'], 'Board Service': ['Trustee, Boston Red Sox Foundation']}).to_excel(buffer, index=False)
+    buffer.seek(0)
+    df = DataParser().parse_excel_bytes(buffer)
+    assert 'employment' not in df.columns
+    assert 'employment_norm' not in df.columns
+    assert df['board_service_norm'].tolist() == ['boston red sox']
@@ -0,0 +1,61 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.data_parser import DataParser
+from app.tfidf_model import TFIDFModel
+
+XLSX_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'MODEL_DIR', str(tmp_path))
+    monkeypatch.setattr(main, 'dataset', None)
+    monkeypatch.setattr(main, 'search_model', None)
+    return tmp_path
+
+
+def make_xlsx():
+    buffer = io.BytesIO()
+    pd.DataFrame({
+        'Name': ['Ann', 'Bob', 'Cy'],
+        'Professional Title/Employment & Career': ['CEO, Boston Red Sox', 'Harvard Medical School', 'Retired'],
+        'Board Service': ['Trustee, Boston Foundation', 'No board service info', 'Red Cross chair'],
+    }).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def test_load_saved_model_discards_truncated_file(model_dir):
+    model = TFIDFModel(**main.MODEL_PARAMS)
+    model.fit_corpus(DataParser().parse_excel_bytes(io.BytesIO(make_xlsx())), ['employment_norm', 'board_service_norm'])
+    main.save_model(model, 'key')
+    path = main.saved_model_path('key')
+    with open(path, 'r+b') as f:
+        f.truncate(100)
+
+    assert main.load_saved_model(path) is None
+    assert not os.path.exists(path)
+
+
+def test_reupload_uses_saved_model(model_dir, monkeypatch):
+    contents = make_xlsx()
+    with TestClient(main.app) as client:
+        first = client.post('/upload', files={'file': ('data.xlsx', contents, XLSX_TYPE)})
+        assert first.status_code == 200
+        assert len(os.listdir(model_dir)) == 1
+
+        # The second upload must be served from the saved model without parsing
+        def fail(*args, **kwargs):
+            raise AssertionError('re-upload should not be parsed')
+        monkeypatch.setattr(DataParser, 'parse_excel_bytes', fail)
+        second = client.post('/upload', files={'file': ('data.xlsx', contents, XLSX_TYPE)})
+
+        assert second.status_code == 200
+        assert second.json() == first.json()
+        match = client.post('/match', json={'query': 'boston red sox', 'min_score': 0.5})
+        assert match.json()['matches'][0]['name'] == 'Ann'
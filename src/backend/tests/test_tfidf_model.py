@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import tfidf_model
+from app.tfidf_model import TFIDFModel
+
+CORPUS = pd.DataFrame({
+    'name': ['Ann', 'Bob', 'Cy', 'Di', 'Ed'],
+    'employment': [''] * 5,
+    'board_service': [''] * 5,
+    'text': [
+        'boston red sox foundation trustee',
+        'harvard medical school boston',
+        'red cross chair red cross',
+        'venture capital partners fund',
+        'zürich symphony orchestra café board',
+    ],
+})
+
+QUERIES = [
+    'Boston Red Sox',
+    'red red red cross',
+    'Harvard, Medical!  School',
+    'ZÜRICH café symphony',
+    'unknown words only',
+    'a',
+    '',
+]
+
+
+def fit_model(ngram_range=(1, 2), **vectorizer_params):
+    model = TFIDFModel(ngram_range=ngram_range)
+    model.vectorizer.set_params(**vectorizer_params)
+    model.fit_corpus(CORPUS, ['text'])
+    return model
+
+
+def assert_matches_transform(model, query):
+    indices, weights = model.vectorize_query(query)
+    dense = np.zeros(len(model.vectorizer.vocabulary_), dtype=np.float32)
+    dense[indices] = weights
+    expected = model.vectorizer.transform([query]).toarray().ravel()
+    np.testing.assert_allclose(dense, expected, atol=1e-6)
+
+
+@pytest.mark.parametrize('ngram_range', [(1, 1), (1, 2), (2, 3)])
+@pytest.mark.parametrize('query', QUERIES)
+def test_vectorize_query_matches_transform(ngram_range, query):
+    model = fit_model(ngram_range)
+    assert model._fast_query
+    assert_matches_transform(model, query)
+
+
+@pytest.mark.parametrize('vectorizer_params', [
+    {'stop_words': ['red']},
+    {'sublinear_tf': True},
+    {'strip_accents': 'unicode'},
+    {'analyzer': 'char_wb'},
+])
+@pytest.mark.parametrize('query', QUERIES)
+def test_vectorize_query_falls_back_for_other_configs(vectorizer_params, query):
+    model = fit_model(**vectorizer_params)
+    assert not model._fast_query
+    assert_matches_transform(model, query)
+
+
+def test_rank_threshold_matches_normalized_scores():
+    rng = np.random.default_rng(0)
+    words = 'boston red sox foundation harvard medical school chair fund capital art museum'.split()
+    texts = [' '.join(rng.choice(words, size=rng.integers(1, 12))) for _ in range(500)]
+    df = pd.DataFrame({'name': [str(i) for i in range(500)], 'employment': '', 'board_service': '', 'text': texts})
+    model = TFIDFModel()
+    model.fit_corpus(df, ['text'])
+
+    query = 'boston red sox fund'
+    scores = model.compute_similarity(query)
+    normalized = model.normalize_scores(scores, scores.min(), scores.max())
+    for min_score in np.unique(normalized)[::5]:
+        min_score = float(min_score)
+        expected = np.count_nonzero(normalized >= min_score)
+        results = model.rank(query, top_k=len(df), min_score=min_score)
+        assert len(results['score']) == expected
+        assert (results['score'] >= min_score).all()
+
+
+def test_save_load_round_trip(tmp_path):
+    model = fit_model()
+    path = tmp_path / 'model.joblib'
+    model.save(path)
+    loaded = TFIDFModel.load(path, ngram_range=(1, 2))
+
+    assert isinstance(loaded.corpus_csc.data, np.memmap)
+    assert loaded.source_columns == CORPUS.columns.tolist()
+    for query in QUERIES:
+        expected = model.rank(query, top_k=5)
+        actual = loaded.rank(query, top_k=5)
+        assert list(actual['name']) == list(expected['name'])
+        np.testing.assert_array_equal(actual['score'], expected['score'])
+
+
+@pytest.mark.parametrize('params', [
+    {'max_features': 100, 'ngram_range': (1, 2)},
+    {'ngram_range': (1, 1)},
+])
+def test_load_rejects_different_params(tmp_path, params):
+    path = tmp_path / 'model.joblib'
+    fit_model().save(path)
+    with pytest.raises(ValueError):
+        TFIDFModel.load(path, **params)
+
+
+def test_load_rejects_different_format_version(tmp_path, monkeypatch):
+    path = tmp_path / 'model.joblib'
+    fit_model().save(path)
+    monkeypatch.setattr(tfidf_model, 'INDEX_FORMAT_VERSION', tfidf_model.INDEX_FORMAT_VERSION + 1)
+    with pytest.raises(ValueError):
+        TFIDFModel.load(path, ngram_range=(1, 2))